@@ -1,14 +1,50 @@
 import os
 import csv
 import json
+from collections import deque
+from contextlib import contextmanager
 
 DEFAULT_FILE = "companies.txt"
 DELIMITER = "|"
+# Maximum number of records kept across the whole undo/redo history
+HISTORY_BUDGET = 10000
+NULL_BUDGETS = ('FREE', 'NONE', 'NAN', 'NULL', 'N/A', 'NA')
+# Header variants accepted for each field in CSV/JSON files
+NIT_KEYS = ['nit', 'id', 'NIT', 'ID']
+NAME_KEYS = ['name', 'nombre', 'NAME', 'NOMBRE', 'label', 'LABEL']
+ADDRESS_KEYS = ['address', 'direccion', 'ADDRESS', 'DIRECCION', 'loc', 'LOC', 'location', 'LOCATION']
+BUDGET_KEYS = ['budget', 'presupuesto', 'BUDGET', 'PRESUPUESTO', 'money', 'MONEY']
+
+
+def unused_path(path):
+    """Return path, or path with _2, _3, ... before the extension if that file already exists."""
+    base, ext = os.path.splitext(path)
+    candidate, n = path, 1
+    while os.path.exists(candidate):
+        n += 1
+        candidate = f"{base}_{n}{ext}"
+    return candidate
+
+
+class PipeDialect(csv.Dialect):
+    """Positional TXT format: nit|name|address|budget, no quoting."""
+    delimiter = DELIMITER
+    quoting = csv.QUOTE_NONE
+    escapechar = None
+    lineterminator = "\n"
+    skipinitialspace = False
+    strict = False
 
 class CompanyManager:
     def __init__(self):
         self.companies = []
         self.current_file = DEFAULT_FILE
+        # Each history entry is a list of (op, index, old, new) tuples; a group is one step
+        self.undo_stack = deque()
+        self.redo_stack = deque()
+        self._history_size = 0
+        self._pending_ops = None
+        self.last_report = None
         self.load_initial_data()
 
     def load_initial_data(self):
@@ -19,6 +55,8 @@ class CompanyManager:
                 print(f"Error loading initial file: {e}")
 
     def save_changes(self):
+        # No save target after a validated import with rejects, until the caller picks one
+        if not self.current_file: return
         if self.current_file.endswith('.json'):
             self.export_json(self.current_file)
         elif self.current_file.endswith('.csv'):
@@ -38,7 +76,8 @@ class CompanyManager:
 
         new_company = {"nit": nit, "name": name, "address": address, "budget": budget}
         self.companies.append(new_company)
-        self.save_changes()
+        self._record("insert", len(self.companies) - 1, None, new_company)
+        self._persist()
 
     def update_company(self, original_nit, new_nit, name, address, budget):
         if original_nit != new_nit and self.nit_exists(new_nit):
@@ -50,14 +89,112 @@ class CompanyManager:
         except ValueError:
             raise ValueError("Budget must be a valid number.")
 
-        self.companies[idx] = {"nit": new_nit, "name": name, "address": address, "budget": budget}
-        self.save_changes()
+        old_company = self.companies[idx]
+        new_company = {"nit": new_nit, "name": name, "address": address, "budget": budget}
+        self.companies[idx] = new_company
+        self._record("update", idx, old_company, new_company)
+        self._persist()
 
     def delete_company(self, nit):
         idx = self._find_index(nit)
         if idx is None: raise ValueError("Company not found.")
+        self._record("delete", idx, self.companies[idx], None)
         del self.companies[idx]
+        self._persist()
+
+    def delete_companies(self, nits):
+        """Delete several companies as a single undo step. Nothing is deleted if any NIT is unknown."""
+        positions = {}
+        for i, comp in enumerate(self.companies):
+            positions.setdefault(comp['nit'], i)
+        missing = [nit for nit in nits if nit not in positions]
+        if missing: raise ValueError(f"Company not found: {', '.join(missing)}.")
+        with self.group():
+            # Highest index first, so the remaining indexes stay valid while deleting
+            for idx in sorted({positions[nit] for nit in nits}, reverse=True):
+                self._record("delete", idx, self.companies[idx], None)
+                del self.companies[idx]
+
+    @contextmanager
+    def group(self):
+        """Collect every change made inside the block into one undo step, saved once on exit."""
+        if self._pending_ops is not None:
+            yield
+            return
+        self._pending_ops = []
+        try:
+            yield
+        finally:
+            ops, self._pending_ops = self._pending_ops, None
+            if ops:
+                self._push_undo(ops)
+                self.save_changes()
+
+    def _persist(self):
+        # Inside group() the outermost block saves once on exit
+        if self._pending_ops is None:
+            self.save_changes()
+
+    def _record(self, op, idx, old, new):
+        if self._pending_ops is not None:
+            self._pending_ops.append((op, idx, old, new))
+        else:
+            self._push_undo([(op, idx, old, new)])
+
+    def _push_undo(self, ops):
+        # A step larger than the whole budget cannot be kept, and the older steps no longer
+        # apply without it, so the history starts over after it
+        if len(ops) > HISTORY_BUDGET:
+            self.clear_history()
+            return
+        self.undo_stack.append(ops)
+        self._history_size += len(ops)
+        for entry in self.redo_stack:
+            self._history_size -= len(entry)
+        self.redo_stack.clear()
+        # Evict the oldest steps once the record budget is exceeded
+        while self._history_size > HISTORY_BUDGET:
+            self._history_size -= len(self.undo_stack.popleft())
+
+    def clear_history(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._history_size = 0
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        # An edit reverts in O(1) in memory, but saving still rewrites the whole registry file
+        if not self.undo_stack: return False
+        ops = self.undo_stack.pop()
+        for op, idx, old, new in reversed(ops):
+            if op == "insert":
+                del self.companies[idx]
+            elif op == "delete":
+                self.companies.insert(idx, old)
+            else:
+                self.companies[idx] = old
+        self.redo_stack.append(ops)
+        self.save_changes()
+        return True
+
+    def redo(self):
+        if not self.redo_stack: return False
+        ops = self.redo_stack.pop()
+        for op, idx, old, new in ops:
+            if op == "insert":
+                self.companies.insert(idx, new)
+            elif op == "delete":
+                del self.companies[idx]
+            else:
+                self.companies[idx] = new
+        self.undo_stack.append(ops)
         self.save_changes()
+        return True
 
     def nit_exists(self, nit):
         return any(e['nit'] == nit for e in self.companies)
@@ -67,67 +204,208 @@ class CompanyManager:
             if comp['nit'] == nit: return i
         return None
 
-    def import_file(self, path):
+    def import_file(self, path, validator=None, reject_path=None):
+        """
+        Load companies from a TXT, CSV or JSON file.
+        With a validation.Validator, failing rows are written to reject_path (default: a new
+        <file>_rejects.csv next to the imported file, numbered so an earlier report is never
+        overwritten) and the ValidationReport with the counters is returned.
+        If rows were rejected the source is not adopted as current_file, so saving cannot silently
+        rewrite it without them; changes are not saved until the caller sets current_file.
+        """
         if not os.path.exists(path): raise FileNotFoundError(f"File not found: {path}")
         ext = os.path.splitext(path)[1].lower()
-        new_data = []
+        report = None
         try:
-            if ext == '.json':
+            if validator is not None:
+                if reject_path is None:
+                    reject_path = unused_path(os.path.splitext(path)[0] + "_rejects.csv")
+                companies, report = self._import_validated(path, ext, validator, reject_path)
+                skipped_rows = 0
+            elif ext == '.json':
                 try:
                     with open(path, 'r', encoding='utf-8') as f: new_data = json.load(f)
                 except json.JSONDecodeError as e:
                     raise Exception(f"Invalid JSON format: {e}. Please check the file syntax.")
+                companies, skipped_rows = self._normalize_records(new_data)
             elif ext == '.csv':
                 with open(path, 'r', encoding='utf-8', newline='') as f: new_data = list(csv.DictReader(f))
+                companies, skipped_rows = self._normalize_records(new_data)
             else:
-                with open(path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        stripped_line = line.strip()
-                        # Skip empty lines
-                        if not stripped_line:
-                            continue
-                        parts = stripped_line.split(DELIMITER)
-                        # Take only the first 4 parts, skip if fewer than 4
-                        if len(parts) >= 4:
-                            new_data.append({"nit": parts[0], "name": parts[1], "address": parts[2], "budget": parts[3]})
+                # TXT columns are positional, so no header mapping is needed
+                companies, skipped_rows = self._read_txt(path)
             
-            self.companies = []
-            skipped_rows = 0
-            
-            for comp in new_data:
-                try:
-                    # Try to map headers intelligently for CSV/JSON with different headers
-                    nit = self._extract_field(comp, ['nit', 'id', 'NIT', 'ID'])
-                    name = self._extract_field(comp, ['name', 'nombre', 'NAME', 'NOMBRE', 'label', 'LABEL'])
-                    address = self._extract_field(comp, ['address', 'direccion', 'ADDRESS', 'DIRECCION', 'loc', 'LOC', 'location', 'LOCATION'])
-                    budget = self._extract_field(comp, ['budget', 'presupuesto', 'BUDGET', 'PRESUPUESTO', 'money', 'MONEY'], is_numeric=True)
-                    
-                    # Validate required fields
-                    if not nit or not name or not address:
-                        skipped_rows += 1
-                        continue
-                    
-                    try:
-                        budget = float(budget) if budget else 0.0
-                    except (ValueError, TypeError):
-                        budget = 0.0
-                    
-                    self.companies.append({
-                        "nit": str(nit), 
-                        "name": str(name), 
-                        "address": str(address), 
-                        "budget": budget
-                    })
-                except Exception:
-                    skipped_rows += 1
-                    continue
+            self.companies = companies
             
             if skipped_rows > 0:
                 print(f"Warning: Skipped {skipped_rows} rows with missing required fields (nit, name, address).")
+            if report is not None and report.rejected > 0:
+                print(f"Warning: Rejected {report.rejected} rows, see {report.reject_path}.")
             
-            self.current_file = path
+            self.current_file = None if report is not None and report.rejected > 0 else path
+            self.last_report = report
+            # Recorded indexes refer to the previous list, so the history no longer applies
+            self.clear_history()
         except Exception as e: raise Exception(f"Error reading file: {e}")
+        return report
+
+    def _import_validated(self, path, ext, validator, reject_path):
+        accepted, report = validator.run(self._read_raw_rows(path, ext), reject_path)
+        companies = [{
+            "nit": fields["nit"],
+            "name": fields["name"],
+            "address": fields["address"],
+            "budget": 0.0 if fields["budget"] is None else self._parse_budget(str(fields["budget"]))
+        } for fields in accepted]
+        return companies, report
+
+    def _read_raw_rows(self, path, ext):
+        """
+        Yield (row_number, raw_line, fields) for the validation stage, with the budget left unconverted.
+        Undecodable bytes are kept as surrogates so they can be reported instead of aborting the import.
+        """
+        if ext == '.json':
+            try:
+                with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f: new_data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise Exception(f"Invalid JSON format: {e}. Please check the file syntax.")
+            if not isinstance(new_data, list):
+                new_data = [new_data]
+            for row_number, record in enumerate(new_data, 1):
+                raw_line = json.dumps(record, ensure_ascii=False)
+                yield row_number, raw_line, self._raw_fields(record) if isinstance(record, dict) else None
+        elif ext == '.csv':
+            with open(path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as f:
+                # Keep the text fed to the reader so rejects show the line as written, quotes included
+                consumed = []
+                reader = csv.reader(consumed.append(line) or line for line in f)
+                header = next(reader, [])
+                consumed.clear()
+                row_number = reader.line_num + 1
+                for row in reader:
+                    raw_line = "".join(consumed).rstrip('\r\n')
+                    consumed.clear()
+                    first_line, row_number = row_number, reader.line_num + 1
+                    # Same as csv.DictReader, which skips blank lines
+                    if not row:
+                        continue
+                    yield first_line, raw_line, self._raw_fields(dict(zip(header, row)))
+        else:
+            # With QUOTE_NONE, joining the fields gives back the original line
+            consumed = 0
+            try:
+                with open(path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as f:
+                    reader = csv.reader(f, PipeDialect)
+                    for row in reader:
+                        consumed = reader.line_num
+                        row_fields = self._txt_fields(row)
+                        if row_fields is not False:
+                            yield consumed, DELIMITER.join(row), row_fields
+            except csv.Error:
+                # A field over csv.field_size_limit(); continue from that line by splitting, like _read_txt
+                with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+                    for row_number, line in enumerate(f, 1):
+                        if row_number <= consumed:
+                            continue
+                        row = line.strip().split(DELIMITER)
+                        row_fields = self._txt_fields(row)
+                        if row_fields is not False:
+                            yield row_number, line.rstrip('\r\n'), row_fields
+
+    @staticmethod
+    def _txt_fields(row):
+        """Fields for a TXT row, None when it has fewer than 4 parts, False for a blank line."""
+        if not row or (len(row) == 1 and not row[0].strip()):
+            return False
+        if len(row) < 4:
+            return None
+        return {"nit": row[0].strip(), "name": row[1].strip(), "address": row[2].strip(), "budget": row[3]}
+
+    def _raw_fields(self, record):
+        budget = next((record[k] for k in BUDGET_KEYS if record.get(k) is not None), None)
+        return {
+            "nit": self._extract_field(record, NIT_KEYS),
+            "name": self._extract_field(record, NAME_KEYS),
+            "address": self._extract_field(record, ADDRESS_KEYS),
+            "budget": budget
+        }
+
+    def _normalize_records(self, new_data):
+        """Map CSV/JSON records with varying headers to companies. Returns (companies, skipped_rows)."""
+        companies = []
+        skipped_rows = 0
+        
+        for comp in new_data:
+            try:
+                # Try to map headers intelligently for CSV/JSON with different headers
+                nit = self._extract_field(comp, NIT_KEYS)
+                name = self._extract_field(comp, NAME_KEYS)
+                address = self._extract_field(comp, ADDRESS_KEYS)
+                budget = self._extract_field(comp, BUDGET_KEYS, is_numeric=True)
+                
+                # Validate required fields
+                if not nit or not name or not address:
+                    skipped_rows += 1
+                    continue
+                
+                try:
+                    budget = float(budget) if budget else 0.0
+                except (ValueError, TypeError):
+                    budget = 0.0
+                
+                companies.append({
+                    "nit": str(nit), 
+                    "name": str(name), 
+                    "address": str(address), 
+                    "budget": budget
+                })
+            except Exception:
+                skipped_rows += 1
+                continue
+        
+        return companies, skipped_rows
     
+    def _read_txt(self, path):
+        """Parse a pipe-delimited TXT file with the C csv reader. Returns (companies, skipped_rows)."""
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                return self._txt_companies(csv.reader(f, PipeDialect))
+        except csv.Error:
+            # csv.reader rejects fields longer than csv.field_size_limit(); split line by line instead
+            with open(path, 'r', encoding='utf-8') as f:
+                return self._txt_companies(line.strip().split(DELIMITER) for line in f)
+
+    def _txt_companies(self, rows):
+        companies = []
+        skipped_rows = 0
+        parse_budget = self._parse_budget
+        for row in rows:
+            # Blank lines come back with at most one field; take only the first 4 parts, skip if fewer than 4
+            if len(row) < 4:
+                continue
+            nit, name, address = row[0].strip(), row[1].strip(), row[2].strip()
+            if not nit or not name or not address:
+                skipped_rows += 1
+                continue
+            companies.append({"nit": nit, "name": name, "address": address, "budget": parse_budget(row[3])})
+        return companies, skipped_rows
+
+    @staticmethod
+    def _parse_budget(value):
+        """Convert a raw TXT budget to float, falling back to 0.0 like the generic import path."""
+        try:
+            budget = float(value)
+        except ValueError:
+            cleaned = value.replace('$', '').replace(',', '').strip()
+            if not cleaned or cleaned.upper() in NULL_BUDGETS:
+                return 0.0
+            try:
+                return float(cleaned)
+            except ValueError:
+                return 0.0
+        # float() accepts "nan", which the generic path treats as missing
+        return 0.0 if budget != budget else budget
+
     def _extract_field(self, record, field_names, is_numeric=False):
         """Try to extract a field value from a record using multiple possible field names."""
         if not isinstance(record, dict):
@@ -158,7 +436,7 @@ class CompanyManager:
                     # Remove common currency symbols and thousands separators
                     cleaned = value_str.replace('$', '').replace(',', '').strip()
                     # Skip non-numeric strings like "FREE", "None", "NaN"
-                    if cleaned.upper() in ('FREE', 'NONE', 'NAN', 'NULL', 'N/A', 'NA'):
+                    if cleaned.upper() in NULL_BUDGETS:
                         continue
                     return float(cleaned)
                 except (ValueError, TypeError):
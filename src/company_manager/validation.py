@@ -0,0 +1,222 @@
+import os
+import re
+import csv
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .manager import NULL_BUDGETS
+
+BATCH_SIZE = 10000
+
+NIT_PATTERN = re.compile(r"^(\d{1,15})(?:-(\d))?$")
+# DIAN weights, applied from the rightmost digit of the NIT
+NIT_WEIGHTS = (3, 7, 13, 17, 19, 23, 29, 37, 41, 43, 47, 53, 59, 67, 71)
+# UTF-8 text that was decoded as Latin-1 somewhere along the way (e.g. "BogotÃ¡")
+MOJIBAKE_PATTERN = re.compile("[\u00c2\u00c3][\u0080-\u00bf]")
+# Undecodable bytes survive as lone surrogates (errors='surrogateescape')
+SURROGATE_PATTERN = re.compile("[\udc80-\udcff]")
+
+
+def normalize_nit(nit):
+    if "." not in nit and " " not in nit:
+        return nit
+    return nit.replace(".", "").replace(" ", "")
+
+
+def nit_check_digit(number):
+    total = sum(int(d) * w for d, w in zip(reversed(number), NIT_WEIGHTS))
+    remainder = total % 11
+    return remainder if remainder < 2 else 11 - remainder
+
+
+# =============================================================================
+# RULES - each takes the row fields and returns a reject reason or None
+# =============================================================================
+
+def check_required(fields):
+    if not fields["nit"] or not fields["name"] or not fields["address"]:
+        return "missing required fields (nit, name, address)"
+    return None
+
+
+def check_nit(fields):
+    nit = fields["nit"]
+    if not nit:
+        return None
+    # Plain digits without a check digit, the common case
+    if nit.isdigit() and len(nit) <= 15 and nit.isascii():
+        return None
+    match = NIT_PATTERN.match(normalize_nit(nit))
+    if not match:
+        return "invalid NIT format"
+    number, digit = match.groups()
+    if digit is not None and int(digit) != nit_check_digit(number):
+        return "invalid NIT check digit"
+    return None
+
+
+def check_budget(fields):
+    value = fields["budget"]
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return "non-numeric budget"
+    try:
+        # Plain numbers skip the currency cleanup
+        amount = float(value)
+    except ValueError:
+        cleaned = value.replace('$', '').replace(',', '').strip()
+        # Blank and null-like budgets ("N/A", "FREE", ...) are missing, and default to 0.0 like a plain import
+        if not cleaned or cleaned.upper() in NULL_BUDGETS:
+            return None
+        try:
+            amount = float(cleaned)
+        except ValueError:
+            return "non-numeric budget"
+    # NaN is missing too, as in CompanyManager._parse_budget
+    if amount != amount:
+        return None
+    if amount < 0:
+        return "negative budget"
+    return None
+
+
+def check_encoding(fields):
+    for key in ("nit", "name", "address"):
+        value = fields[key]
+        # Plain ASCII cannot carry any of the problems below
+        if not value or value.isascii():
+            continue
+        if SURROGATE_PATTERN.search(value):
+            return f"invalid UTF-8 bytes in {key}"
+        if '\ufffd' in value:
+            return f"replacement character in {key}"
+        if MOJIBAKE_PATTERN.search(value):
+            return f"double-encoded text in {key}"
+    return None
+
+
+DEFAULT_RULES = (check_required, check_nit, check_budget, check_encoding)
+
+
+def _check_batch(rules, batch):
+    """Return the first failing reason (or None) for every fields dict in the batch."""
+    reasons = []
+    for fields in batch:
+        reason = None
+        if fields is None:
+            reason = "malformed row"
+        else:
+            for rule in rules:
+                reason = rule(fields)
+                if reason: break
+        reasons.append(reason)
+    return reasons
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+class ValidationReport:
+    def __init__(self):
+        self.total_rows = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.reasons = Counter()
+        # Set once the reject file was written; stays None when nothing was rejected or writing failed
+        self.reject_path = None
+        self.reject_error = None
+
+    def __repr__(self):
+        return (f"ValidationReport(total_rows={self.total_rows}, accepted={self.accepted}, "
+                f"rejected={self.rejected}, reasons={dict(self.reasons)})")
+
+
+class Validator:
+    def __init__(self, rules=DEFAULT_RULES, check_duplicates=True, workers=None, batch_size=BATCH_SIZE):
+        """
+        Rules run serially by default, and the GUI import never turns the worker pool on: for the
+        built-in regex rules, sending rows to other processes costs more than it saves. Pass
+        workers > 1 to opt in for expensive custom rules, which must then be module-level functions.
+        """
+        self.rules = tuple(rules)
+        self.check_duplicates = check_duplicates
+        self.workers = workers
+        self.batch_size = batch_size
+
+    def run(self, rows, reject_path=None):
+        """
+        Validate (row_number, raw_line, fields) tuples; fields is None for rows that could not be split.
+        Rows are pulled in batches as they are read. Returns (accepted_fields, report).
+        Rejects stream to a temporary file that is only created on the first reject, and replaces
+        reject_path once every row was read. A report that cannot be written only prints a warning.
+        """
+        report = ValidationReport()
+        accepted = []
+        seen_nits = {}
+        reject_file = writer = None
+        completed = False
+        try:
+            for batch, reasons in self._evaluate(rows):
+                for (row_number, raw_line, fields), reason in zip(batch, reasons):
+                    report.total_rows += 1
+                    detail = reason
+                    # Duplicates depend on earlier rows, so they are checked here in file order
+                    if reason is None and self.check_duplicates and fields["nit"]:
+                        first_row = seen_nits.setdefault(normalize_nit(fields["nit"]), row_number)
+                        if first_row != row_number:
+                            reason = "duplicate NIT"
+                            detail = f"duplicate NIT (first seen on row {first_row})"
+                    if reason is None:
+                        report.accepted += 1
+                        accepted.append(fields)
+                        continue
+                    report.rejected += 1
+                    report.reasons[reason] += 1
+                    if not reject_path or report.reject_error:
+                        continue
+                    try:
+                        if writer is None:
+                            reject_file = open(reject_path + ".tmp", "w", encoding="utf-8", errors="backslashreplace", newline='')
+                            writer = csv.writer(reject_file)
+                            writer.writerow(["row", "raw_line", "reason"])
+                        writer.writerow([row_number, raw_line, detail])
+                    except OSError as e:
+                        report.reject_error = str(e)
+            completed = True
+        finally:
+            if reject_file is not None:
+                try:
+                    reject_file.close()
+                    if completed and not report.reject_error:
+                        os.replace(reject_path + ".tmp", reject_path)
+                        report.reject_path = reject_path
+                    else:
+                        os.remove(reject_path + ".tmp")
+                except OSError as e:
+                    report.reject_error = report.reject_error or str(e)
+        if report.reject_error:
+            print(f"Warning: Could not write the reject report {reject_path}: {report.reject_error}")
+        return accepted, report
+
+    def _evaluate(self, rows):
+        rows = iter(rows)
+        batches = iter(lambda: list(islice(rows, self.batch_size)), [])
+        if not self.workers or self.workers < 2:
+            for batch in batches:
+                yield batch, _check_batch(self.rules, [fields for _, _, fields in batch])
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # Keep a couple of batches per worker in flight, so the file is not read and pickled up front
+            pending = deque()
+            for batch in batches:
+                pending.append((batch, pool.submit(_check_batch, self.rules, [fields for _, _, fields in batch])))
+                if len(pending) >= 2 * self.workers:
+                    batch, job = pending.popleft()
+                    yield batch, job.result()
+            # Results are consumed in file order so the reject file and duplicate check stay ordered
+            while pending:
+                batch, job = pending.popleft()
+                yield batch, job.result()
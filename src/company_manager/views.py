@@ -2,7 +2,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import time
 from .styles import *
-from .manager import CompanyManager
+from .manager import CompanyManager, unused_path
+from .validation import Validator
 import os
 
 # =============================================================================
@@ -152,6 +153,16 @@ class CompanyApp(tk.Tk):
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Export JSON", command=lambda: self.export_file('json'))
         file_menu.add_command(label="Exit", command=self.quit)
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Edit", menu=edit_menu)
+        # macOS uses the Command key; the upper-case variants fire with Caps Lock or Shift held
+        mod, label = ("Command", "Cmd") if self.tk.call("tk", "windowingsystem") == "aqua" else ("Control", "Ctrl")
+        edit_menu.add_command(label="Undo", accelerator=f"{label}+Z", command=self.undo)
+        edit_menu.add_command(label="Redo", accelerator=f"{label}+Y", command=self.redo)
+        for key in ("z", "Z"):
+            self.bind_all(f"<{mod}-{key}>", self.undo)
+        for key in ("y", "Y"):
+            self.bind_all(f"<{mod}-{key}>", self.redo)
 
     def create_input(self, parent, label_text, attr_name):
         ttk.Label(parent, text=label_text).pack(anchor="w")
@@ -175,9 +186,26 @@ class CompanyApp(tk.Tk):
     def delete_selected(self):
         sel = self.tree.selection()
         if not sel: return
-        nit = str(self.tree.item(sel[0])['values'][0])
-        self.manager.delete_company(nit)
-        self.list_companies()
+        nits = [str(self.tree.item(item)['values'][0]) for item in sel]
+        try:
+            self.manager.delete_companies(nits)
+        except Exception as e: messagebox.showerror("Error", str(e))
+        self.list_companies(self.entr_search.get())
+
+    def undo(self, event=None):
+        # Inside the form the shortcut belongs to the entry, so unsaved input is not cleared
+        if event is not None and isinstance(event.widget, (tk.Entry, ttk.Entry)): return
+        if self.manager.undo():
+            self.clear_form()
+            self.list_companies(self.entr_search.get())
+        return "break"
+
+    def redo(self, event=None):
+        if event is not None and isinstance(event.widget, (tk.Entry, ttk.Entry)): return
+        if self.manager.redo():
+            self.clear_form()
+            self.list_companies(self.entr_search.get())
+        return "break"
 
     def open_file_dialog(self):
         path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json"), ("Text files", "*.txt"), ("CSV files", "*.csv")])
@@ -189,11 +217,30 @@ class CompanyApp(tk.Tk):
         path = self.path_search.get()
         if path:
             try:
-                self.manager.import_file(path)
+                report = self.manager.import_file(path, validator=Validator())
                 self.list_companies()
-                messagebox.showinfo("Success", "File imported successfully")
+                if report.rejected:
+                    self.choose_save_target(path, report)
+                else:
+                    messagebox.showinfo("Success", "File imported successfully")
             except Exception as e: messagebox.showerror("Error", str(e))
 
+    def choose_save_target(self, path, report):
+        """The manager does not adopt a file with rejected rows; ask before it gets rewritten without them."""
+        where = f"see:\n{report.reject_path}" if report.reject_path else "(the reject report could not be written)"
+        base, ext = os.path.splitext(path)
+        clean_path = unused_path(f"{base}_clean{ext}")
+        keep = messagebox.askyesno("Imported with rejects",
+            f"Imported {report.accepted} of {report.total_rows} rows.\n"
+            f"{report.rejected} rows were rejected, {where}\n\n"
+            f"Save changes back to {os.path.basename(path)}? It would be rewritten without the rejected rows.\n"
+            f"Choose No to save them to {os.path.basename(clean_path)} instead.")
+        if keep:
+            self.manager.current_file = path
+        else:
+            self.manager.current_file = clean_path
+            self.manager.save_changes()
+
     def list_companies(self, filter_text=""):
         for i in self.tree.get_children(): self.tree.delete(i)
         for comp in self.manager.companies:
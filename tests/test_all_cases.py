@@ -3,9 +3,13 @@
 
 import sys
 import os
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+import csv
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+import company_manager.manager as manager_module
 from company_manager.manager import CompanyManager
+from company_manager.validation import Validator, check_budget
 
 def test_file(test_file_path, description):
     """Test loading a file and report results."""
@@ -27,8 +31,299 @@ def test_file(test_file_path, description):
         print(f"       Error: {e}")
         return False
 
+def new_manager(tmp_dir):
+    """Manager with an empty registry saved inside tmp_dir instead of ./companies.txt."""
+    manager = CompanyManager()
+    manager.companies = []
+    manager.clear_history()
+    manager.current_file = os.path.join(tmp_dir, 'registry.txt')
+    return manager
+
+def nits(manager):
+    return [comp['nit'] for comp in manager.companies]
+
+def test_undo_redo():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = new_manager(tmp_dir)
+        manager.add_company('1001', 'Globex Corp', 'Springfield', '150000.50')
+        manager.add_company('1002', 'Initech', 'Houston', '45000')
+        manager.add_company('1003', 'Hooli', 'Palo Alto', '2500000')
+        original = [dict(comp) for comp in manager.companies]
+
+        manager.update_company('1002', '1002', 'Initech Ltd', 'Austin', '50000')
+        manager.delete_companies(['1001', '1003'])
+        edited = [dict(comp) for comp in manager.companies]
+        assert nits(manager) == ['1002']
+
+        # The bulk delete is a single step
+        assert manager.undo()
+        assert nits(manager) == ['1001', '1002', '1003']
+        assert manager.undo()
+        assert manager.companies == original
+
+        assert manager.redo() and manager.redo()
+        assert manager.companies == edited
+        assert not manager.redo()
+
+        # Every step is saved to the registry file
+        reloaded = new_manager(tmp_dir)
+        reloaded.import_file(manager.current_file)
+        assert reloaded.companies == edited
+
+        # A new edit clears the redo history
+        manager.undo()
+        manager.add_company('1004', 'Umbrella', 'Raccoon City', '10')
+        assert not manager.can_redo()
+
+def test_undo_group_saves():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = new_manager(tmp_dir)
+        manager.add_company('1001', 'Globex Corp', 'Springfield', '1')
+        manager.add_company('1002', 'Initech', 'Houston', '2')
+        with manager.group():
+            manager.delete_company('1001')
+            manager.update_company('1002', '1002', 'Initech Ltd', 'Austin', '3')
+        reloaded = new_manager(tmp_dir)
+        reloaded.import_file(manager.current_file)
+        assert reloaded.companies == manager.companies
+
+        manager.undo()
+        assert nits(manager) == ['1001', '1002']
+        assert manager.companies[1]['name'] == 'Initech'
+
+def test_undo_bulk_delete_unknown_nit():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = new_manager(tmp_dir)
+        manager.add_company('1001', 'Globex Corp', 'Springfield', '1')
+        manager.add_company('1002', 'Initech', 'Houston', '2')
+        steps = len(manager.undo_stack)
+        try:
+            manager.delete_companies(['1001', '7'])
+            assert False, "unknown NIT should raise"
+        except ValueError:
+            pass
+        # Nothing deleted, saved or recorded
+        assert nits(manager) == ['1001', '1002']
+        assert len(manager.undo_stack) == steps
+        reloaded = new_manager(tmp_dir)
+        reloaded.import_file(manager.current_file)
+        assert nits(reloaded) == ['1001', '1002']
+
+def test_undo_eviction():
+    budget = manager_module.HISTORY_BUDGET
+    manager_module.HISTORY_BUDGET = 2
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manager = new_manager(tmp_dir)
+            for nit in ('1', '2', '3'):
+                manager.add_company(nit, 'Name', 'Address', '0')
+            assert len(manager.undo_stack) == 2
+            while manager.undo(): pass
+            # The oldest insert was evicted, so it can no longer be undone
+            assert nits(manager) == ['1']
+
+            # A step larger than the budget is not kept, and neither is the history before it
+            manager.redo(); manager.redo()
+            manager.delete_companies(['1', '2', '3'])
+            assert nits(manager) == []
+            assert not manager.can_undo() and not manager.can_redo()
+    finally:
+        manager_module.HISTORY_BUDGET = budget
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Expected (nit, name, address, budget) rows, as loaded by the original line-splitting parser
+TXT_EXPECTED = {
+    'test_txt_missing_cols.txt': [('101', 'Google', 'Mountain View', 90000.0), ('104', 'Partial', 'Data', 77.0)],
+    'test_txt_extra_pipes.txt': [('101', 'Google', 'Mountain View', 90000.0), ('102', 'Special', 'Pipes', 0.0),
+                                 ('103', 'Too', 'Many', 0.0), ('104', 'Name', 'Addr', 5000.0)],
+    'test_txt_empty_lines.txt': [('101', 'Google', 'Mountain View', 90000.0), ('102', 'Apple', 'Cupertino', 80000.0),
+                                 ('103', 'Meta', 'Menlo', 70000.0), ('104', 'Tesla', 'Austin', 60000.0)],
+    'test_txt_bad_budget.txt': [('101', 'Google', 'Mountain View', 90000.0), ('102', 'BrokeCo', 'Nowhere', 0.0),
+                                ('103', 'RichCo', 'Mars', 1000000.0), ('104', 'NaN_Co', 'Earth', 0.0)],
+    'test_txt_budget_sentinels.txt': [('201', 'NanCo', 'Earth', 0.0), ('202', 'NaCo', 'Earth', 0.0),
+                                      ('203', 'BlankCo', 'Earth', 0.0), ('204', 'SciCo', 'Earth', 1000.0),
+                                      ('206', 'NegCo', 'Earth', -2500.5)],
+}
+
+def rows(manager):
+    return [(comp['nit'], comp['name'], comp['address'], comp['budget']) for comp in manager.companies]
+
+def test_txt_parser_rules():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = new_manager(tmp_dir)
+        for filename, expected in TXT_EXPECTED.items():
+            manager.import_file(os.path.join(TESTS_DIR, filename))
+            assert rows(manager) == expected, filename
+
+def test_txt_long_field():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Longer than csv.field_size_limit(), which the fast path cannot read
+        path = os.path.join(tmp_dir, 'long.txt')
+        long_name = 'N' * 200000
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"101|{long_name}|Street|10\n102|Short|Street|20\n")
+        manager = new_manager(tmp_dir)
+        manager.import_file(path)
+        assert rows(manager) == [('101', long_name, 'Street', 10.0), ('102', 'Short', 'Street', 20.0)]
+
+def validate(tmp_dir, filename, **options):
+    """Import a fixture (or absolute path) with a Validator; returns (manager, report, reject rows without the header)."""
+    manager = new_manager(tmp_dir)
+    reject_path = os.path.join(tmp_dir, 'rejects.csv')
+    report = manager.import_file(os.path.join(TESTS_DIR, filename), validator=Validator(**options), reject_path=reject_path)
+    with open(reject_path, encoding='utf-8', newline='') as f:
+        reject_rows = list(csv.reader(f))
+    assert reject_rows[0] == ['row', 'raw_line', 'reason']
+    assert report.reject_path == reject_path
+    assert report.total_rows == report.accepted + report.rejected == report.accepted + len(reject_rows) - 1
+    return manager, report, reject_rows[1:]
+
+def test_validation_nit_check_digit():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager, report, rejects = validate(tmp_dir, 'test_txt_bad_check_digit.txt')
+        assert nits(manager) == ['800.197.268-4', '900123456-8']
+        assert rejects == [['3', '900123456-1|Wrong DV|Cali|3000', 'invalid NIT check digit'],
+                           ['4', '12A45|Letters|Cali|4000', 'invalid NIT format']]
+        assert dict(report.reasons) == {'invalid NIT check digit': 1, 'invalid NIT format': 1}
+
+def test_validation_duplicate_nit():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager, report, rejects = validate(tmp_dir, 'test_txt_duplicate_nit.txt')
+        # The first occurrence wins; dotted and plain NITs are the same company
+        assert [comp['name'] for comp in manager.companies] == ['First', 'Other', 'Dotted']
+        assert rejects == [['3', '101|Repeated|Medellin|3000', 'duplicate NIT (first seen on row 1)'],
+                           ['5', '900123456-8|Undotted|Bogota|5000', 'duplicate NIT (first seen on row 4)']]
+        assert dict(report.reasons) == {'duplicate NIT': 2}
+
+def test_validation_negative_budget():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager, report, rejects = validate(tmp_dir, 'test_txt_negative_budget.txt')
+        assert rows(manager) == [('101', 'Positive', 'Bogota', 1000.0), ('104', 'Zero', 'Cali', 0.0)]
+        assert [row[0] for row in rejects] == ['2', '3']
+        assert dict(report.reasons) == {'negative budget': 2}
+
+def test_validation_encoding():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Invalid bytes are appended here; as a fixture they would break pytest's test*.txt doctest collection
+        path = os.path.join(tmp_dir, 'bad_utf8.txt')
+        with open(os.path.join(TESTS_DIR, 'test_txt_mojibake.txt'), 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data + b"104|Bad\xffBytes|Cali|2000\n")
+        manager, report, rejects = validate(tmp_dir, path)
+        assert rows(manager) == [('101', 'Corporación', 'Bogotá', 1000.0)]
+        # Undecodable bytes are escaped in the reject file
+        assert rejects == [['2', '102|BogotÃ¡ Ltda|Bogota|3000', 'double-encoded text in name'],
+                           ['3', '103|Replaced \ufffd Char|Cali|4000', 'replacement character in name'],
+                           ['4', '104|Bad\\udcffBytes|Cali|2000', 'invalid UTF-8 bytes in name']]
+
+def test_validation_csv_raw_lines():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager, report, rejects = validate(tmp_dir, 'test_csv_quoted_rejects.csv')
+        assert nits(manager) == ['401', '404']
+        assert manager.companies[0]['name'] == 'Google, Inc.'
+        assert rejects == [['3', '402,"Acme, Co.","Vegas, NV",-80000.0', 'negative budget'],
+                           ['4', '403,"Multi\nLine, Co.","Paris, FR",TBD', 'non-numeric budget']]
+
+def test_validation_failed_import_keeps_report():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        validate(tmp_dir, 'test_txt_bad_check_digit.txt')
+        manager = new_manager(tmp_dir)
+        reject_path = os.path.join(tmp_dir, 'rejects.csv')
+        try:
+            manager.import_file(os.path.join(TESTS_DIR, 'test_json_corrupted.json'), validator=Validator(), reject_path=reject_path)
+            assert False, "corrupted JSON should not import"
+        except Exception as e:
+            assert 'Invalid JSON format' in str(e)
+        with open(reject_path, encoding='utf-8', newline='') as f:
+            assert len(list(csv.reader(f))) == 3
+        assert sorted(os.listdir(tmp_dir)) == ['rejects.csv']
+
+def test_validation_keeps_source_file():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'source.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("101|A|B|10\n101|Dup|B|20\n102|Sentinel|B|FREE\n")
+        manager = new_manager(tmp_dir)
+        report = manager.import_file(path, validator=Validator())
+        # Null-like budgets load as 0.0, like a plain import
+        assert rows(manager) == [('101', 'A', 'B', 10.0), ('102', 'Sentinel', 'B', 0.0)]
+        assert report.reject_path == os.path.join(tmp_dir, 'source_rejects.csv')
+        # A file with rejected rows is not adopted, so an edit cannot rewrite it without them
+        assert manager.current_file is None
+        manager.add_company('103', 'New', 'C', '1')
+        with open(path, encoding='utf-8') as f:
+            assert f.read().count('\n') == 3
+
+        # A second report gets a new name instead of replacing the first one
+        report = manager.import_file(path, validator=Validator())
+        assert report.reject_path == os.path.join(tmp_dir, 'source_rejects_2.csv')
+        assert sorted(os.listdir(tmp_dir)) == ['source.txt', 'source_rejects.csv', 'source_rejects_2.csv']
+
+def test_validation_clean_import():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'clean.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("101|A|B|10\n")
+        manager = new_manager(tmp_dir)
+        report = manager.import_file(path, validator=Validator())
+        # No rejects: no report file, and the source is adopted as usual
+        assert report.rejected == 0 and report.reject_path is None
+        assert manager.current_file == path
+        assert sorted(os.listdir(tmp_dir)) == ['clean.txt']
+
+def test_validation_unwritable_report():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = new_manager(tmp_dir)
+        reject_path = os.path.join(tmp_dir, 'missing_dir', 'rejects.csv')
+        report = manager.import_file(os.path.join(TESTS_DIR, 'test_txt_negative_budget.txt'),
+                                     validator=Validator(), reject_path=reject_path)
+        # The import still succeeds; only the report is missing
+        assert nits(manager) == ['101', '104']
+        assert report.rejected == 2 and report.reject_path is None and report.reject_error
+
+def test_validation_custom_rules():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Rows without a NIT must not break the duplicate check when check_required is left out
+        path = os.path.join(tmp_dir, 'no_nit.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('[{"name": "x", "address": "y", "budget": 1}, {"nit": "5", "name": "z", "address": "w", "budget": -1}]')
+        manager = new_manager(tmp_dir)
+        report = manager.import_file(path, validator=Validator(rules=[check_budget]), reject_path=os.path.join(tmp_dir, 'r.csv'))
+        assert report.accepted == 1 and dict(report.reasons) == {'negative budget': 1}
+
+def test_validation_long_txt_field():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'long.txt')
+        long_name = 'N' * 200000
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"101|Short|Street|10\n102|{long_name}|Street|20\n102|Dup|Street|30\n")
+        manager, report, rejects = validate(tmp_dir, path)
+        assert rows(manager) == [('101', 'Short', 'Street', 10.0), ('102', long_name, 'Street', 20.0)]
+        assert rejects == [['3', '102|Dup|Street|30', 'duplicate NIT (first seen on row 2)']]
+
+def test_validation_worker_pool():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        serial = validate(tmp_dir, 'test_txt_duplicate_nit.txt')
+        pooled = validate(tmp_dir, 'test_txt_duplicate_nit.txt', workers=2, batch_size=2)
+        assert serial[0].companies == pooled[0].companies
+        assert serial[1].reasons == pooled[1].reasons
+        assert serial[2] == pooled[2]
+
+def run_check(check, description):
+    """Run a check that raises AssertionError on failure and report the result."""
+    try:
+        check()
+        print(f"✓ PASS | {description}")
+        return True
+    except Exception as e:
+        print(f"✗ FAIL | {description}")
+        print(f"       Error: {e!r}")
+        return False
+
 def main():
-    tests_dir = os.path.join(os.path.dirname(__file__), 'tests')
+    tests_dir = TESTS_DIR
     
     passed = 0
     failed = 0
@@ -46,6 +341,7 @@ def main():
         ('test_txt_empty_lines.txt', 'TXT - Empty lines (should skip)'),
         ('test_txt_bad_budget.txt', 'TXT - Invalid budget values'),
         ('test_txt_encoding.txt', 'TXT - Unicode characters'),
+        ('test_txt_budget_sentinels.txt', 'TXT - Budget sentinels (nan, N/A, blank)'),
     ]
     
     for test_filename, desc in txt_tests:
@@ -57,6 +353,14 @@ def main():
                 failed += 1
         print()
     
+    for check, desc in [(test_txt_parser_rules, 'TXT - Skip rules and budget conversion match expected rows'),
+                        (test_txt_long_field, 'TXT - Field longer than the csv field size limit')]:
+        if run_check(check, desc):
+            passed += 1
+        else:
+            failed += 1
+    print()
+    
     print("=" * 80)
     print("TESTING EDGE CASES - CSV FILES")
     print("=" * 80)
@@ -103,6 +407,50 @@ def main():
                 failed += 1
         print()
     
+    print("=" * 80)
+    print("TESTING UNDO / REDO")
+    print("=" * 80)
+    
+    undo_checks = [
+        (test_undo_redo, 'Undo/redo - Add, update and bulk delete round trip'),
+        (test_undo_group_saves, 'Undo/redo - Grouped changes are saved and undone together'),
+        (test_undo_bulk_delete_unknown_nit, 'Undo/redo - Bulk delete with an unknown NIT changes nothing'),
+        (test_undo_eviction, 'Undo/redo - Oldest steps evicted past HISTORY_BUDGET'),
+    ]
+    
+    for check, desc in undo_checks:
+        if run_check(check, desc):
+            passed += 1
+        else:
+            failed += 1
+    print()
+    
+    print("=" * 80)
+    print("TESTING IMPORT VALIDATION")
+    print("=" * 80)
+    
+    validation_checks = [
+        (test_validation_nit_check_digit, 'Validation - NIT format and check digit'),
+        (test_validation_duplicate_nit, 'Validation - Duplicate NIT keeps the first row'),
+        (test_validation_negative_budget, 'Validation - Negative budgets rejected'),
+        (test_validation_encoding, 'Validation - Bad UTF-8 bytes, mojibake and replacement characters'),
+        (test_validation_csv_raw_lines, 'Validation - CSV rejects keep the original quoted line'),
+        (test_validation_failed_import_keeps_report, 'Validation - Failed import keeps the previous reject file'),
+        (test_validation_keeps_source_file, 'Validation - Source with rejects is not rewritten; reports are not replaced'),
+        (test_validation_clean_import, 'Validation - Clean import writes no reject file'),
+        (test_validation_unwritable_report, 'Validation - Unwritable reject report only warns'),
+        (test_validation_custom_rules, 'Validation - Custom rules without check_required'),
+        (test_validation_long_txt_field, 'Validation - Field longer than the csv field size limit'),
+        (test_validation_worker_pool, 'Validation - Worker pool matches serial results'),
+    ]
+    
+    for check, desc in validation_checks:
+        if run_check(check, desc):
+            passed += 1
+        else:
+            failed += 1
+    print()
+    
     print("=" * 80)
     print("TEST SUMMARY")
     print("=" * 80)